@@ -2,8 +2,10 @@ import asyncio
 import sys
 import time
 import signal
+import sqlite3
 import random
 import aiohttp
+import orjson
 from datetime import datetime
 from loguru import logger
 from aiogram import Bot, Dispatcher, types
@@ -13,49 +15,119 @@ from aiogram.client.default import DefaultBotProperties
 
 from config import (
     API_BASE_URL, API_TOKEN, THREAD_IDS,
-    BUMP_INTERVAL, CHECK_INTERVAL, API_DELAY,
+    BUMP_INTERVAL, CHECK_INTERVAL, API_DELAY, API_BURST, MAX_CONCURRENT_BUMPS,
     RETRY_DELAYS, MAX_CONSECUTIVE_FAILURES, TOKEN_ERROR_PAUSE,
+    BUMP_RETRY_ATTEMPTS, RETRY_BACKOFF_CAP, WAL_CHECKPOINT_CYCLES,
     TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, ADMIN_USER_IDS, USER_AGENT
 )
 from database import Database
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+TELEGRAM_TEXT_LIMIT = 3900
+
 dp = Dispatcher()
 bot = None
 service = None
 if TELEGRAM_BOT_TOKEN and 'YOUR_' not in TELEGRAM_BOT_TOKEN:
     bot = Bot(token=TELEGRAM_BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
+def format_wait(wait_sec: int) -> str:
+    h, rem = divmod(max(0, wait_sec), 3600)
+    m = rem // 60
+    return f"{h}h {m:02d}m" if h > 0 else f"{m}m"
+
+class AsyncRateLimiter:
+    def __init__(self, rate: float, burst: int, max_block: float):
+        self.rate = rate
+        self.burst = burst
+        self.max_block = max_block
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+    
+    async def acquire(self):
+        while True:
+            wait = self._blocked_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            async with self._lock:
+                if self._blocked_until > time.monotonic():
+                    continue
+                self._refill()
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill()
+                self.tokens -= 1
+                return
+    
+    def update(self, remaining: int | None = None, retry_after: float | None = None):
+        if remaining is not None:
+            self._refill()
+            self.tokens = min(self.tokens, remaining)
+        if retry_after:
+            block = min(retry_after, self.max_block)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + block)
+
 class AsyncBumpService:
-    def __init__(self):
+    def __init__(self, session: aiohttp.ClientSession):
         self.db = Database()
-        self.headers = {
-            'Authorization': f'Bearer {API_TOKEN}',
-            'User-Agent': USER_AGENT
-        }
+        self.session = session
+        self.limiter = AsyncRateLimiter(1 / API_DELAY, API_BURST, RETRY_BACKOFF_CAP)
+        self._info_fmt = API_BASE_URL + '/threads/%d'
+        self._bump_fmt = API_BASE_URL + '/threads/%d/bump'
+        self._rng = random.Random()
         self.running = True
-        self._session = None
         self._cycle_lock = asyncio.Lock()
         self._cycle_running = False
         self._last_error_notify = 0
         self._cycle_count = 0
     
-    async def get_session(self):
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(headers=self.headers)
-        return self._session
-    
     async def close(self):
         self.running = False
-        if self._session:
-            await self._session.close()
+        self.db.close()
+    
+    def _update_rate_limit(self, response: aiohttp.ClientResponse) -> float | None:
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        retry_after = response.headers.get('Retry-After')
+        try:
+            remaining = int(remaining) if remaining is not None else None
+        except ValueError:
+            logger.debug(f"Unparsable X-RateLimit-Remaining: {remaining!r}")
+            remaining = None
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            logger.debug(f"Unparsable Retry-After: {retry_after!r}")
+            retry_after = None
+        self.limiter.update(remaining=remaining, retry_after=retry_after)
+        return retry_after
+    
+    async def _read_json_capped(self, response: aiohttp.ClientResponse, cap: int = 65536) -> dict | None:
+        buf = bytearray()
+        async for chunk in response.content.iter_chunked(8192):
+            buf += chunk
+            if len(buf) > cap:
+                logger.warning(f"Response from {response.url} exceeds {cap} bytes, discarding")
+                return None
+        return orjson.loads(buf)
             
     async def _get_thread_info(self, thread_id: int) -> dict | None:
-        url = f'{API_BASE_URL}/threads/{thread_id}'
-        session = await self.get_session()
+        url = self._info_fmt % thread_id
         try:
-            async with session.get(url, timeout=30) as response:
+            await self.limiter.acquire()
+            async with self.session.get(url, timeout=30) as response:
+                self._update_rate_limit(response)
                 if response.status == 200:
-                    data = await response.json()
-                    logger.debug(f"Thread {thread_id} info: {list(data.keys())}")
+                    data = await self._read_json_capped(response)
+                    if data is not None:
+                        logger.debug(f"Thread {thread_id} info: {list(data.keys())}")
                     return data
                 elif response.status == 429:
                     logger.warning("Rate limit hit")
@@ -68,95 +140,118 @@ class AsyncBumpService:
         now = int(time.time())
         config_ids = set(THREAD_IDS)
         
-        db_threads = self.db.get_all_threads()
-        db_ids = {t['thread_id'] for t in db_threads}
+        db_threads = await asyncio.to_thread(self.db.get_all_threads)
+        db_by_id = {t['thread_id']: t for t in db_threads}
+        missing = [tid for tid in config_ids if tid not in db_by_id]
+        unknown = [tid for tid in config_ids if tid in db_by_id and db_by_id[tid]['title'] == 'Unknown']
+        
+        infos = await asyncio.gather(*[self._get_thread_info(tid) for tid in missing + unknown])
+        
+        rows = []
+        for thread_id, info in zip(missing, infos):
+            title = 'Unknown'
+            next_bump = now
+            
+            if info:
+                title = info.get('thread', {}).get('thread_title', 'Unknown')
+                bump_info = info.get('thread', {}).get('permissions', {}).get('bump', {})
+                if bump_info.get('next_available_time'):
+                    next_bump = bump_info['next_available_time']
+            
+            rows.append((thread_id, title, next_bump))
+            logger.info(f"Added new thread: {title}")
+        await asyncio.to_thread(self.db.insert_threads, rows, now=now)
+        
+        for thread_id, info in zip(unknown, infos[len(missing):]):
+            if info:
+                title = info.get('thread', {}).get('thread_title', 'Unknown')
+                if title != 'Unknown':
+                    await asyncio.to_thread(self.db.upsert_thread, thread_id, now, title=title)
+                    logger.info(f"Updated title: {title}")
+        
         for thread_id in config_ids:
-            if thread_id not in db_ids:
-                info = await self._get_thread_info(thread_id)
-                title = 'Unknown'
-                next_bump = now
-                
-                if info:
-                    title = info.get('thread', {}).get('thread_title', 'Unknown')
-                    bump_info = info.get('thread', {}).get('permissions', {}).get('bump', {})
-                    if bump_info.get('next_available_time'):
-                        next_bump = bump_info['next_available_time']
-                
-                self.db.upsert_thread(thread_id, title=title, next_bump_time=next_bump)
-                logger.info(f"Added new thread: {title}")
-                await asyncio.sleep(API_DELAY)
-            else:
-                thread = next(t for t in db_threads if t['thread_id'] == thread_id)
-                if not thread.get('is_active'):
-                    self.db.activate_thread(thread_id)
-                    logger.info(f"Re-activated thread {thread_id}")
-                if thread.get('title') == 'Unknown':
-                    info = await self._get_thread_info(thread_id)
-                    if info:
-                        title = info.get('thread', {}).get('thread_title', 'Unknown')
-                        if title != 'Unknown':
-                            self.db.upsert_thread(thread_id, title=title)
-                            logger.info(f"Updated title: {title}")
-                        await asyncio.sleep(API_DELAY)
+            if thread_id in db_by_id and not db_by_id[thread_id]['is_active']:
+                await asyncio.to_thread(self.db.activate_thread, thread_id, now)
+                logger.info(f"Re-activated thread {thread_id}")
 
         for thread in db_threads:
             tid = thread['thread_id']
-            if tid not in config_ids and thread.get('is_active'):
-                self.db.deactivate_thread(tid)
+            if tid not in config_ids and thread['is_active']:
+                await asyncio.to_thread(self.db.deactivate_thread, tid, now)
                 logger.info(f"Deactivated thread {tid} (removed from config)")
 
     async def _bump_thread(self, thread_id: int) -> dict:
-        url = f'{API_BASE_URL}/threads/{thread_id}/bump'
-        session = await self.get_session()
+        url = self._bump_fmt % thread_id
         result = {'success': False, 'message': '', 'next_time': None}
         
         try:
-            async with session.post(url, timeout=30) as response:
-                data = await response.json()
+            for attempt in range(BUMP_RETRY_ATTEMPTS):
+                await self.limiter.acquire()
+                async with self.session.post(url, timeout=30) as response:
+                    retry_after = self._update_rate_limit(response)
+                    status = response.status
+                    retrying = (
+                        status in RETRYABLE_STATUSES
+                        and attempt < BUMP_RETRY_ATTEMPTS - 1
+                        and (retry_after or 0) <= RETRY_BACKOFF_CAP
+                    )
+                    if not retrying:
+                        try:
+                            data = await self._read_json_capped(response) or {}
+                        except orjson.JSONDecodeError:
+                            logger.debug(f"Bump {thread_id} returned a non-JSON body ({status})")
+                            data = {}
+                        break
                 
-                if response.status == 200 and data.get('status') == 'ok':
-                    result['success'] = True
-                    result['message'] = data.get('message', 'Bumped')
-                    jitter = random.randint(30, 300)
-                    result['next_time'] = int(time.time()) + BUMP_INTERVAL + jitter
-                    logger.debug(f"Applied jitter: +{jitter}s")
-                    
-                elif response.status == 403 and 'errors' in data:
-                    result['message'] = data['errors'][0]
-                    result['is_cooldown'] = True
-                    info = await self._get_thread_info(thread_id)
-                    if info:
-                        bump = info.get('thread', {}).get('permissions', {}).get('bump', {})
-                        if bump.get('next_available_time'):
-                            result['next_time'] = bump['next_available_time']
-                    if not result['next_time']:
-                        result['next_time'] = int(time.time()) + BUMP_INTERVAL
-                        
-                elif response.status == 429:
-                    result['message'] = 'Rate Limit'
-                    result['next_time'] = int(time.time()) + 120
-                    
-                elif response.status == 401:
-                    logger.critical("INVALID TOKEN - pausing all threads")
-                    result['message'] = 'Token Error'
-                    result['is_token_error'] = True
-                    result['next_time'] = int(time.time()) + TOKEN_ERROR_PAUSE
-                    if bot:
-                        await bot.send_message(TELEGRAM_CHAT_ID, f"<b>Token Error!</b>\nRetry in {TOKEN_ERROR_PAUSE//60}m")
-                    return result
-
+                logger.warning(f"Bump {thread_id} got {status}, retry {attempt + 1}/{BUMP_RETRY_ATTEMPTS - 1}")
+                if retry_after:
+                    await asyncio.sleep(min(retry_after, RETRY_BACKOFF_CAP))
                 else:
-                    result['message'] = f"Error {response.status}"
+                    await asyncio.sleep(self._rng.uniform(0, min(RETRY_BACKOFF_CAP, 2 ** attempt)))
+            
+            if status == 200 and data.get('status') == 'ok':
+                result['success'] = True
+                result['message'] = data.get('message', 'Bumped')
+                jitter = self._rng.randint(30, 300)
+                result['next_time'] = int(time.time()) + BUMP_INTERVAL + jitter
+                logger.debug(f"Applied jitter: +{jitter}s")
+                
+            elif status == 403 and 'errors' in data:
+                result['message'] = data['errors'][0]
+                result['is_cooldown'] = True
+                info = await self._get_thread_info(thread_id)
+                if info:
+                    bump = info.get('thread', {}).get('permissions', {}).get('bump', {})
+                    if bump.get('next_available_time'):
+                        result['next_time'] = bump['next_available_time']
+                if not result['next_time']:
+                    result['next_time'] = int(time.time()) + BUMP_INTERVAL
                     
+            elif status == 429:
+                result['message'] = 'Rate Limit'
+                result['next_time'] = int(time.time()) + 120
+                
+            elif status == 401:
+                logger.critical("INVALID TOKEN - pausing all threads")
+                result['message'] = 'Token Error'
+                result['is_token_error'] = True
+                result['next_time'] = int(time.time()) + TOKEN_ERROR_PAUSE
+                if bot:
+                    await bot.send_message(TELEGRAM_CHAT_ID, f"<b>Token Error!</b>\nRetry in {TOKEN_ERROR_PAUSE//60}m")
+                return result
+
+            else:
+                result['message'] = f"Error {status}"
+                
         except Exception as e:
             result['message'] = str(e)
             
         return result
 
-    async def process_thread(self, thread: dict) -> dict:
+    async def process_thread(self, thread: sqlite3.Row, now: int) -> dict:
         thread_id = thread['thread_id']
-        title = thread.get('title', str(thread_id))
-        consecutive_failures = thread.get('consecutive_failures', 0)
+        title = thread['title'] or str(thread_id)
+        consecutive_failures = thread['consecutive_failures'] or 0
         
         logger.info(f"Processing: {title}")
         result = await self._bump_thread(thread_id)
@@ -165,40 +260,41 @@ class AsyncBumpService:
         
         if result['success']:
             logger.success(f"Bumped {thread_id}")
-            self.db.record_bump_success(thread_id, result['message'], result['next_time'])
             
         elif result.get('is_cooldown'):
             logger.warning(f"Cooldown {thread_id}")
-            self.db.upsert_thread(thread_id, next_bump_time=result['next_time'], last_error=result['message'], consecutive_failures=0)
+            await asyncio.to_thread(self.db.upsert_thread, thread_id, now, next_bump_time=result['next_time'], last_error=result['message'], consecutive_failures=0)
         
         elif result.get('is_token_error'):
             logger.warning(f"Token error - pausing all threads for {TOKEN_ERROR_PAUSE//60}m")
-            for t in self.db.get_all_threads():
-                if t.get('is_active'):
-                    self.db.upsert_thread(t['thread_id'], next_bump_time=result['next_time'])
             
         else:
             consecutive_failures += 1
             if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
                 logger.error(f"Skipping {thread_id} (10 fails)")
-                next_retry = int(time.time()) + BUMP_INTERVAL
-                self.db.upsert_thread(
-                    thread_id, next_bump_time=next_retry, 
+                next_retry = now + BUMP_INTERVAL
+                await asyncio.to_thread(
+                    self.db.upsert_thread, thread_id, now, next_bump_time=next_retry, 
                     last_error=f"Too many errors: {result['message']}", 
                     consecutive_failures=0
                 )
-                now = int(time.time())
                 if bot and (now - self._last_error_notify) > 300:
                     self._last_error_notify = now
                     await bot.send_message(TELEGRAM_CHAT_ID, f"<b>! Skipped {thread_id}</b> (too many errors)")
             else:
                 delay = RETRY_DELAYS[min(consecutive_failures, len(RETRY_DELAYS)-1)]
-                next_retry = int(time.time()) + delay
+                next_retry = now + delay
                 logger.error(f"Error {thread_id}: {result['message']}")
-                self.db.record_bump_failure(thread_id, result['message'], next_retry)
+                result['next_time'] = next_retry
+                result['is_retry'] = True
                 
         return result
 
+    async def _pause_all_threads(self, next_bump_time: int, now: int):
+        for t in await asyncio.to_thread(self.db.get_all_threads):
+            if t['is_active']:
+                await asyncio.to_thread(self.db.upsert_thread, t['thread_id'], now, next_bump_time=next_bump_time)
+
     async def run_cycle(self, force: bool = False):
         if self._cycle_running and not force:
             logger.debug("Cycle already running, skipping")
@@ -208,21 +304,40 @@ class AsyncBumpService:
             self._cycle_running = True
             try:
                 self._cycle_count += 1
-                if self._cycle_count % 720 == 0:
-                    self.db.cleanup_old_history(days=30)
+                if self._cycle_count % WAL_CHECKPOINT_CYCLES == 0:
+                    await asyncio.to_thread(self.db.checkpoint)
                 
-                ready = self.db.get_threads_ready_for_bump()
+                now = int(time.time())
+                ready = await asyncio.to_thread(self.db.get_threads_ready_for_bump, now)
                 if not ready:
                     return True
                 
                 logger.info(f"Ready threads: {len(ready)}")
+                sem = asyncio.Semaphore(MAX_CONCURRENT_BUMPS)
+                
                 results = []
                 
-                for thread in ready:
-                    if not self.running: break
-                    res = await self.process_thread(thread)
-                    results.append(res)
-                    await asyncio.sleep(API_DELAY)
+                async def _one(thread):
+                    async with sem:
+                        if not self.running:
+                            return
+                        results.append(await self.process_thread(thread, now))
+                
+                try:
+                    outcomes = await asyncio.gather(*[_one(t) for t in ready], return_exceptions=True)
+                    for thread, outcome in zip(ready, outcomes):
+                        if isinstance(outcome, Exception):
+                            logger.opt(exception=outcome).error(f"Error processing {thread['thread_id']}: {outcome}")
+                finally:
+                    await asyncio.to_thread(
+                        self.db.record_bump_batch,
+                        [(r['thread_id'], r['message'], r['next_time']) for r in results if r['success']],
+                        [(r['thread_id'], r['message'], r['next_time']) for r in results if r.get('is_retry')],
+                        now=now
+                    )
+                    token_error = next((r for r in results if r.get('is_token_error')), None)
+                    if token_error:
+                        await self._pause_all_threads(token_error['next_time'], now)
                     
                 if results and bot:
                     await self._notify_summary(results)
@@ -233,29 +348,35 @@ class AsyncBumpService:
     async def _notify_summary(self, results: list):
         bumped = [r for r in results if r['success']]
         
-        all_threads = self.db.get_all_threads()
         now = int(time.time())
-        pending = [
-            t for t in all_threads 
-            if t.get('is_active') and t['next_bump_time'] > now
-        ]
+        pending = await asyncio.to_thread(self.db.get_pending, now)
         
         lines = []
+        size = 0
+        
+        def add(line: str) -> bool:
+            nonlocal size
+            if size > TELEGRAM_TEXT_LIMIT:
+                return False
+            size += len(line) + 1
+            if size > TELEGRAM_TEXT_LIMIT:
+                lines.append("…")
+                return False
+            lines.append(line)
+            return True
+        
         if bumped:
-            lines.append(f"<b>Success</b> ({len(bumped)})")
+            add(f"<b>Success</b> ({len(bumped)})")
             for item in bumped:
-                thread_id = item.get('thread_id')
-                lines.append(f"     ✔ {thread_id}")
-            lines.append("")
+                if not add(f"     ✔ {item['thread_id']}"):
+                    break
+            add("")
             
         if pending:
-            lines.append(f"<b>Pending</b> ({len(pending)})")
+            add(f"<b>Pending</b> ({len(pending)})")
             for item in pending:
-                thread_id = item.get('thread_id')
-                wait_sec = max(0, item['next_bump_time'] - now)
-                h, m = wait_sec // 3600, (wait_sec % 3600) // 60
-                wait_str = f"{h}h {m:02d}m" if h > 0 else f"{m}m"
-                lines.append(f"<code>{wait_str:>7}</code> - {thread_id}")
+                if not add(f"<code>{format_wait(item['next_bump_time'] - now):>7}</code> - {item['thread_id']}"):
+                    break
         
         if lines:
             try:
@@ -268,13 +389,18 @@ async def status_handler(message: types.Message):
     if ADMIN_USER_IDS and message.from_user.id not in ADMIN_USER_IDS:
         return
 
-    db = Database()
-    threads = db.get_all_threads()
-    active = [t for t in threads if t.get('is_active')]
+    if not service:
+        await message.answer("! Service not ready")
+        return
+
+    threads = await asyncio.to_thread(service.db.get_all_threads)
     now = int(time.time())
     
-    ready = [t for t in active if t['next_bump_time'] <= now]
-    pending = sorted([t for t in active if t['next_bump_time'] > now], key=lambda x: x['next_bump_time'])
+    ready, pending = [], []
+    for t in threads:
+        if t['is_active']:
+            (ready if t['next_bump_time'] <= now else pending).append(t)
+    pending.sort(key=lambda x: x['next_bump_time'])
     
     lines = []
     
@@ -287,10 +413,7 @@ async def status_handler(message: types.Message):
     if pending:
         lines.append(f"<b>Status</b> ({len(pending)})")
         for t in pending:
-            wait_sec = max(0, t['next_bump_time'] - now)
-            h, m = wait_sec // 3600, (wait_sec % 3600) // 60
-            wait_str = f"{h}h {m:02d}m" if h > 0 else f"{m}m"
-            lines.append(f"<code>{wait_str:>7}</code> - {t['thread_id']}")
+            lines.append(f"<code>{format_wait(t['next_bump_time'] - now):>7}</code> - {t['thread_id']}")
         
     await message.answer("\n".join(lines) or "No threads")
 
@@ -312,14 +435,13 @@ async def test_handler(message: types.Message):
         await message.answer("... Cycle already running")
         return
     
-    db = Database()
     now = int(time.time())
-    threads = db.get_all_threads()
+    threads = await asyncio.to_thread(service.db.get_all_threads)
     reset_count = 0
     
     for t in threads:
-        if t.get('is_active') and (t.get('consecutive_failures', 0) > 0 or t['next_bump_time'] > now):
-            db.upsert_thread(t['thread_id'], next_bump_time=now, consecutive_failures=0, last_error=None)
+        if t['is_active'] and ((t['consecutive_failures'] or 0) > 0 or t['next_bump_time'] > now):
+            await asyncio.to_thread(service.db.upsert_thread, t['thread_id'], next_bump_time=now, consecutive_failures=0, last_error=None)
             reset_count += 1
     
     await message.answer(f"> Reset {reset_count} threads\n> Running cycle...")
@@ -355,52 +477,66 @@ async def bump_loop(svc, stop_event: asyncio.Event):
 
 async def main():
     global service
-    service = AsyncBumpService()
-    loop = asyncio.get_running_loop()
-    stop_event = asyncio.Event()
-    bump_task = None
+    headers = {
+        'Authorization': f'Bearer {API_TOKEN}',
+        'User-Agent': USER_AGENT
+    }
+    connector = aiohttp.TCPConnector(
+        limit=32, limit_per_host=MAX_CONCURRENT_BUMPS,
+        ttl_dns_cache=300, keepalive_timeout=75, enable_cleanup_closed=True
+    )
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        service = AsyncBumpService(session)
+        loop = asyncio.get_running_loop()
+        stop_event = asyncio.Event()
+        bump_task = None
     
-    def signal_handler():
-        logger.info("Shutdown signal received")
-        service.running = False
-        stop_event.set()
-        if bump_task:
-            bump_task.cancel()
+        def signal_handler():
+            logger.info("Shutdown signal received")
+            service.running = False
+            stop_event.set()
+            if bump_task:
+                bump_task.cancel()
     
-    for sig in (signal.SIGINT, signal.SIGTERM):
-        loop.add_signal_handler(sig, signal_handler)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, signal_handler)
     
-    bump_task = asyncio.create_task(bump_loop(service, stop_event))
+        bump_task = asyncio.create_task(bump_loop(service, stop_event))
     
-    try:
-        if bot:
-            logger.info("Starting polling + bump loop")
-            polling_task = asyncio.create_task(dp.start_polling(bot))
-            done, pending = await asyncio.wait(
-                [polling_task, bump_task],
-                return_when=asyncio.FIRST_COMPLETED
-            )
-            for task in pending:
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
-        else:
-            logger.info("Starting bump loop only (No Bot)")
-            await bump_task
-    except asyncio.CancelledError:
-        pass
-    finally:
-        await service.close()
-        if bot:
-            await bot.session.close()
-        logger.info("Goodbye!")
+        try:
+            if bot:
+                logger.info("Starting polling + bump loop")
+                polling_task = asyncio.create_task(dp.start_polling(bot))
+                done, pending = await asyncio.wait(
+                    [polling_task, bump_task],
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in pending:
+                    task.cancel()
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
+            else:
+                logger.info("Starting bump loop only (No Bot)")
+                await bump_task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await service.close()
+            if bot:
+                await bot.session.close()
+            logger.info("Goodbye!")
 if __name__ == "__main__":
     logger.remove()
     logger.add(sys.stderr, level="INFO")
     logger.add("bump.log", rotation="10 MB", retention="30 days", level="DEBUG")
     try:
-        asyncio.run(main())
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+    try:
+        run(main())
     except (KeyboardInterrupt, SystemExit):
         logger.info("Force exit")
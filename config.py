@@ -18,13 +18,19 @@ THREAD_IDS = [
 BUMP_INTERVAL = 43200
 CHECK_INTERVAL = 120
 API_DELAY = 1.0
+API_BURST = 3
+MAX_CONCURRENT_BUMPS = 8
 
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 
 RETRY_DELAYS = [60, 300, 900, 3600]
+BUMP_RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_CAP = 60
 MAX_CONSECUTIVE_FAILURES = 10
 TOKEN_ERROR_PAUSE = 3600
 ADMIN_USER_IDS = [id]
 
 DATABASE_PATH = 'bump_data.db'
+HISTORY_MAX_ROWS = 10000
+WAL_CHECKPOINT_CYCLES = 30
 LOG_FILE = 'bump.log'
@@ -1,31 +1,78 @@
+import itertools
 import sqlite3
+import threading
 import time
 from contextlib import contextmanager
 from loguru import logger
 
-from config import DATABASE_PATH
+from config import DATABASE_PATH, HISTORY_MAX_ROWS
+
+BUMP_SUCCESS_SQL = '''
+    UPDATE threads SET 
+        last_bump_time = ?,
+        next_bump_time = ?,
+        bump_count = bump_count + 1,
+        last_error = NULL,
+        consecutive_failures = 0,
+        updated_at = ?
+    WHERE thread_id = ?
+'''
+
+BUMP_FAILURE_SQL = '''
+    UPDATE threads SET 
+        next_bump_time = ?,
+        last_error = ?,
+        consecutive_failures = consecutive_failures + 1,
+        updated_at = ?
+    WHERE thread_id = ?
+'''
+
+HISTORY_BATCH_ROWS = 200
 
 
 class Database:
     def __init__(self, db_path: str = DATABASE_PATH):
         self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._upsert_sql = {}
         self._init_db()
     
     @contextmanager
     def _get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"Database error: {e}")
-            raise
-        finally:
-            conn.close()
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                logger.error(f"Database error: {e}")
+                raise
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def checkpoint(self):
+        with self._lock:
+            busy, log_pages, checkpointed = self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        logger.debug(f"WAL checkpoint: busy={busy}, log={log_pages}, checkpointed={checkpointed}")
     
     def _init_db(self):
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL;')
+        self._conn.execute('PRAGMA synchronous=NORMAL;')
+        self._conn.execute('PRAGMA mmap_size=268435456;')
+        self._conn.execute('PRAGMA cache_size=-20000;')
+        self._conn.execute('PRAGMA temp_store=MEMORY;')
+        self._conn.execute('PRAGMA busy_timeout=5000;')
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
@@ -55,131 +102,122 @@ class Database:
                 )
             ''')
             
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_next_bump ON threads(next_bump_time)')
+            cursor.execute('DROP INDEX IF EXISTS idx_next_bump')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_active_next ON threads(is_active, next_bump_time)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_thread ON bump_history(thread_id)')
-
-            cursor.execute('PRAGMA journal_mode=WAL;')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_time ON bump_history(bump_time, success)')
+            
+            cursor.execute('DROP TRIGGER IF EXISTS trim_history')
+            cursor.execute(f'''
+                CREATE TRIGGER trim_history AFTER INSERT ON bump_history
+                BEGIN
+                    DELETE FROM bump_history WHERE id <= NEW.id - {HISTORY_MAX_ROWS};
+                END
+            ''')
             
             logger.info(f"Database initialized: {self.db_path} (WAL enabled)")
     
-    def get_thread(self, thread_id: int) -> dict | None:
+    @staticmethod
+    def _build_upsert_sql(keys: tuple[str, ...]) -> str:
+        columns = ['thread_id', *keys, 'created_at', 'updated_at']
+        set_parts = [f"{key} = excluded.{key}" for key in keys]
+        set_parts.append("updated_at = excluded.updated_at")
+        
+        return f'''
+            INSERT INTO threads ({', '.join(columns)}) VALUES ({', '.join(['?' for _ in columns])})
+            ON CONFLICT(thread_id) DO UPDATE SET {', '.join(set_parts)}
+        '''
+    
+    def upsert_thread(self, thread_id: int, now: int | None = None, **kwargs):
+        now = now or int(time.time())
+        key = tuple(kwargs)
+        query = self._upsert_sql.get(key)
+        if query is None:
+            query = self._upsert_sql[key] = self._build_upsert_sql(key)
+        
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM threads WHERE thread_id = ?', (thread_id,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
+            conn.execute(query, [thread_id, *kwargs.values(), now, now])
     
-    def upsert_thread(self, thread_id: int, **kwargs):
-        now = int(time.time())
-        existing = self.get_thread(thread_id)
+    def insert_threads(self, rows: list[tuple], now: int | None = None):
+        if not rows:
+            return
+        now = now or int(time.time())
         
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            if existing:
-                set_parts = []
-                values = []
-                for key, value in kwargs.items():
-                    set_parts.append(f"{key} = ?")
-                    values.append(value)
-                set_parts.append("updated_at = ?")
-                values.append(now)
-                values.append(thread_id)
-                
-                query = f"UPDATE threads SET {', '.join(set_parts)} WHERE thread_id = ?"
-                cursor.execute(query, values)
-            else:
-                kwargs['thread_id'] = thread_id
-                kwargs['created_at'] = now
-                kwargs['updated_at'] = now
-                
-                columns = ', '.join(kwargs.keys())
-                placeholders = ', '.join(['?' for _ in kwargs])
-                query = f"INSERT INTO threads ({columns}) VALUES ({placeholders})"
-                cursor.execute(query, list(kwargs.values()))
+            conn.executemany('''
+                INSERT OR IGNORE INTO threads (thread_id, title, next_bump_time, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(thread_id, title, next_bump_time, now, now) for thread_id, title, next_bump_time in rows])
     
-    def get_threads_ready_for_bump(self) -> list[dict]:
-        now = int(time.time())
+    def get_threads_ready_for_bump(self, now: int | None = None) -> list[sqlite3.Row]:
+        now = now or int(time.time())
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+            return conn.execute('''
                 SELECT * FROM threads 
                 WHERE is_active = 1 AND next_bump_time <= ?
                 ORDER BY next_bump_time ASC
-            ''', (now,))
-            return [dict(row) for row in cursor.fetchall()]
+            ''', (now,)).fetchall()
     
-    def get_all_threads(self) -> list[dict]:
+    def get_pending(self, now: int) -> list[sqlite3.Row]:
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM threads ORDER BY thread_id')
-            return [dict(row) for row in cursor.fetchall()]
+            return conn.execute('''
+                SELECT thread_id, title, next_bump_time FROM threads
+                WHERE is_active = 1 AND next_bump_time > ?
+                ORDER BY next_bump_time ASC
+            ''', (now,)).fetchall()
     
-    def record_bump_success(self, thread_id: int, message: str, next_bump_time: int):
-        now = int(time.time())
-        
+    def get_all_threads(self) -> list[sqlite3.Row]:
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE threads SET 
-                    last_bump_time = ?,
-                    next_bump_time = ?,
-                    bump_count = bump_count + 1,
-                    last_error = NULL,
-                    consecutive_failures = 0,
-                    updated_at = ?
-                WHERE thread_id = ?
-            ''', (now, next_bump_time, now, thread_id))
-            
-            cursor.execute('''
-                INSERT INTO bump_history (thread_id, bump_time, success, message)
-                VALUES (?, ?, 1, ?)
-            ''', (thread_id, now, message))
+            return conn.execute('SELECT * FROM threads ORDER BY thread_id').fetchall()
     
-    def record_bump_failure(self, thread_id: int, error: str, next_retry_time: int):
-        now = int(time.time())
+    def record_bump_batch(self, successes: list[tuple], failures: list[tuple], now: int | None = None):
+        if not successes and not failures:
+            return
+        now = now or int(time.time())
         
         with self._get_connection() as conn:
-            cursor = conn.cursor()
+            conn.executemany(BUMP_SUCCESS_SQL, [(now, next_time, now, thread_id) for thread_id, _, next_time in successes])
+            conn.executemany(BUMP_FAILURE_SQL, [(next_time, error, now, thread_id) for thread_id, error, next_time in failures])
             
-            cursor.execute('''
-                UPDATE threads SET 
-                    next_bump_time = ?,
-                    last_error = ?,
-                    consecutive_failures = consecutive_failures + 1,
-                    updated_at = ?
-                WHERE thread_id = ?
-            ''', (next_retry_time, error, now, thread_id))
-            
-            cursor.execute('''
-                INSERT INTO bump_history (thread_id, bump_time, success, message)
-                VALUES (?, ?, 0, ?)
-            ''', (thread_id, now, error))
+            history = [(thread_id, now, 1, message) for thread_id, message, _ in successes]
+            history += [(thread_id, now, 0, error) for thread_id, error, _ in failures]
+            for start in range(0, len(history), HISTORY_BATCH_ROWS):
+                chunk = history[start:start + HISTORY_BATCH_ROWS]
+                query = (
+                    'INSERT INTO bump_history (thread_id, bump_time, success, message) VALUES '
+                    + ', '.join(['(?, ?, ?, ?)'] * len(chunk))
+                )
+                conn.execute(query, list(itertools.chain.from_iterable(chunk)))
     
-    def reset_consecutive_failures(self, thread_id: int):
+    def reset_consecutive_failures(self, thread_id: int, now: int | None = None):
+        now = now or int(time.time())
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE threads SET consecutive_failures = 0, updated_at = ?
                 WHERE thread_id = ?
-            ''', (int(time.time()), thread_id))
+            ''', (now, thread_id))
     
-    def deactivate_thread(self, thread_id: int):
+    def deactivate_thread(self, thread_id: int, now: int | None = None):
+        now = now or int(time.time())
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE threads SET is_active = 0, updated_at = ?
                 WHERE thread_id = ?
-            ''', (int(time.time()), thread_id))
+            ''', (now, thread_id))
     
-    def activate_thread(self, thread_id: int):
+    def activate_thread(self, thread_id: int, now: int | None = None):
+        now = now or int(time.time())
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE threads SET is_active = 1, consecutive_failures = 0, updated_at = ?
                 WHERE thread_id = ?
-            ''', (int(time.time()), thread_id))
+            ''', (now, thread_id))
     
     def get_stats(self) -> dict:
         with self._get_connection() as conn:
@@ -190,10 +228,7 @@ class Database:
             
             day_ago = int(time.time()) - 86400
             cursor.execute('''
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(success) as successful,
-                    COUNT(*) - SUM(success) as failed
+                SELECT COUNT(*) as total, COALESCE(SUM(success), 0) as successful
                 FROM bump_history 
                 WHERE bump_time > ?
             ''', (day_ago,))
@@ -202,16 +237,7 @@ class Database:
             return {
                 'total_threads': threads['total'] or 0,
                 'active_threads': threads['active'] or 0,
-                'bumps_24h': history['total'] or 0,
-                'successful_24h': history['successful'] or 0,
-                'failed_24h': history['failed'] or 0,
+                'bumps_24h': history['total'],
+                'successful_24h': history['successful'],
+                'failed_24h': history['total'] - history['successful'],
             }
-    
-    def cleanup_old_history(self, days: int = 30):
-        cutoff = int(time.time()) - (days * 86400)
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM bump_history WHERE bump_time < ?', (cutoff,))
-            deleted = cursor.rowcount
-            if deleted > 0:
-                logger.info(f"Cleaned up {deleted} old history records")